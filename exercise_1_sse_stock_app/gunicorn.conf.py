@@ -5,8 +5,11 @@ bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
 backlog = 2048
 
 # Worker processes
+# A single process keeps stock_prices shared; threads let one worker hold many
+# SSE streams so a dead or slow client no longer blocks the others
 workers = 1
-worker_class = "sync"
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 100))
 worker_connections = 1000
 timeout = 0  # Disable timeout for SSE streams
 keepalive = 5
@@ -22,6 +25,12 @@ errorlog = "-"
 loglevel = "info"
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
+# Dead-peer detection: accepted sockets inherit the options set on the listener
+def when_ready(server):
+    from server import enable_dead_peer_detection
+    for listener in server.LISTENERS:
+        enable_dead_peer_detection(listener.sock)
+
 # Process naming
 proc_name = 'stock_dashboard'
 
@@ -1,9 +1,44 @@
 from flask import Flask, Response, render_template
-import json, time, random, itertools
-import os
+from werkzeug.serving import WSGIRequestHandler
+import json, time, random, itertools, threading
+import os, socket
 
 app = Flask(__name__)
 
+# SSE tuning (seconds / milliseconds)
+UPDATE_INTERVAL = float(os.environ.get('SSE_UPDATE_INTERVAL', 1.5))
+HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))  # <= 0 disables heartbeats
+RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+RETRY_JITTER_MS = int(os.environ.get('SSE_RETRY_JITTER_MS', 2000))
+
+# Dead-peer detection (Linux). The app only notices a gone client when a write
+# fails; keepalive probes catch idle half-open connections and TCP_USER_TIMEOUT
+# fails writes that stay unacknowledged, which is what closes the generator early.
+TCP_KEEPIDLE = int(os.environ.get('SSE_TCP_KEEPIDLE', 30))
+TCP_KEEPINTVL = int(os.environ.get('SSE_TCP_KEEPINTVL', 10))
+TCP_KEEPCNT = int(os.environ.get('SSE_TCP_KEEPCNT', 3))
+TCP_USER_TIMEOUT_MS = int(os.environ.get('SSE_TCP_USER_TIMEOUT_MS', 30000))
+
+def enable_dead_peer_detection(sock):
+    if sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPIDLE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPINTVL)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, TCP_KEEPCNT)
+    if hasattr(socket, 'TCP_USER_TIMEOUT'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, TCP_USER_TIMEOUT_MS)
+
+class DeadPeerRequestHandler(WSGIRequestHandler):
+    """Dev server (python server.py) counterpart of gunicorn's when_ready hook"""
+    def setup(self):
+        super().setup()
+        enable_dead_peer_detection(self.connection)
+
+active_streams = 0
+streams_lock = threading.Lock()
+
 stock_prices = {
     "AAPL": 170.00,
     "GOOG": 1500.00,
@@ -85,36 +120,63 @@ def index():
 @app.route('/stream')
 def stream():
     def event_stream():
+        global active_streams
         summary_counter = 0
-        
-        while True:
-            event_id = next(event_counter)
-
-            # Send stock update
-            stock_data = generate_stock_update()
-            yield f"id: {event_id}\n"
-            yield f"event: stock_update\n" 
-            yield f"data: {json.dumps(stock_data)}\n\n"
-
-            # Market alert (1 in 4 chance)
-            if random.randint(1, 4) == 1:
-                alert = generate_market_alert()
-                alert_id = next(event_counter)
-                yield f"id: {alert_id}\n"
-                yield f"event: market_alert\n"
-                yield f"data: {json.dumps(alert)}\n\n"
-
-            # Market summary every 10 updates
-            summary_counter += 1
-            if summary_counter >= 10:
-                summary = generate_market_summary()
-                summary_id = next(event_counter)
-                yield f"id: {summary_id}\n"
-                yield f"event: market_summary\n"
-                yield f"data: {json.dumps(summary)}\n\n"
-                summary_counter = 0
-
-            time.sleep(1.5)  # Slightly faster updates
+        with streams_lock:
+            active_streams += 1
+
+        try:
+            # Randomized retry spreads out client reconnects after a mass disconnect
+            yield f"retry: {RETRY_MS + random.randint(0, RETRY_JITTER_MS)}\n\n"
+
+            while True:
+                event_id = next(event_counter)
+
+                # Send stock update
+                stock_data = generate_stock_update()
+                yield f"id: {event_id}\n"
+                yield f"event: stock_update\n" 
+                yield f"data: {json.dumps(stock_data)}\n\n"
+
+                # Market alert (1 in 4 chance)
+                if random.randint(1, 4) == 1:
+                    alert = generate_market_alert()
+                    alert_id = next(event_counter)
+                    yield f"id: {alert_id}\n"
+                    yield f"event: market_alert\n"
+                    yield f"data: {json.dumps(alert)}\n\n"
+
+                # Market summary every 10 updates
+                summary_counter += 1
+                if summary_counter >= 10:
+                    summary = generate_market_summary()
+                    summary_id = next(event_counter)
+                    yield f"id: {summary_id}\n"
+                    yield f"event: market_summary\n"
+                    yield f"data: {json.dumps(summary)}\n\n"
+                    summary_counter = 0
+                last_write = time.monotonic()
+
+                # Heartbeat comment only when nothing was written for HEARTBEAT_INTERVAL
+                # (i.e. when SSE_UPDATE_INTERVAL is longer), so proxies never see an idle stream
+                next_update = last_write + UPDATE_INTERVAL
+                while True:
+                    now = time.monotonic()
+                    if now >= next_update:
+                        break
+                    if HEARTBEAT_INTERVAL <= 0:
+                        time.sleep(next_update - now)
+                        break
+                    next_heartbeat = last_write + HEARTBEAT_INTERVAL
+                    if now >= next_heartbeat:
+                        yield ": heartbeat\n\n"
+                        last_write = now
+                        continue
+                    time.sleep(min(next_update, next_heartbeat) - now)
+        finally:
+            # Runs as soon as a write fails (GeneratorExit), releasing the subscriber
+            with streams_lock:
+                active_streams -= 1
             
     return Response(event_stream(), mimetype='text/event-stream', headers={
         "Cache-Control": "no-cache",
@@ -124,8 +186,8 @@ def stream():
 
 @app.route('/health')
 def health():
-    return {"status": "healthy", "active_stocks": len(stock_prices)}
+    return {"status": "healthy", "active_stocks": len(stock_prices), "active_streams": active_streams}
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=False, request_handler=DeadPeerRequestHandler)
\ No newline at end of file
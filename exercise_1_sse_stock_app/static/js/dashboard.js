@@ -71,7 +71,8 @@ class StockDashboard {
       console.error("EventSource failed:", err);
       this.updateConnectionStatus(false);
 
-      // Auto-reconnect after 5 seconds
+      // The browser retries on its own using the server's retry: hint; this
+      // fallback only covers fatal errors, where the EventSource is CLOSED
       setTimeout(() => {
         if (this.eventSource.readyState === EventSource.CLOSED) {
           this.connect();
@@ -1,6 +1,6 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string
 from flask_cors import CORS
-import threading, time, queue
+import threading, time, queue, json
 from datetime import datetime
 
 app = Flask(__name__)
@@ -9,39 +9,72 @@ CORS(app)
 current_task_status = "En attente"
 status_version = 0
 status_last_updated = datetime.now()
-pending_requests = []
+pending_requests = {}
+stream_subscribers = []
 status_lock = threading.Lock()
 
+TASK_STATUSES = ["En attente", "En cours", "Terminée", "Échec"]
+TERMINAL_STATUSES = frozenset(["Terminée", "Échec"])
+
 class PendingRequest:
-    def __init__(self, response_queue, last_version):
+    def __init__(self, response_queue, last_version, condition=None):
         self.response_queue = response_queue
         self.last_version = last_version
+        self.condition = condition
         self.created_at = time.time()
 
-def notify_pending_clients():
-    global pending_requests
+def condition_holds(condition, status):
+    return condition is None or status in condition
+
+def parse_condition(values):
+    # ?until=terminal ou ?until=Terminée&until=Échec ; None = tout changement
+    targets = set()
+    for value in values:
+        for v in value.split(","):
+            v = v.strip()
+            if not v:
+                continue
+            if v == "terminal":
+                targets |= TERMINAL_STATUSES
+            elif v in TASK_STATUSES:
+                targets.add(v)
+            else:
+                raise ValueError(v)
+    return frozenset(targets) if targets else None
+
+def notify_pending_clients(data):
+    # data est l'instantané pris par update_status : on évalue les conditions sur le statut
+    # qui a déclenché la notification, pas sur le statut courant qui a pu changer depuis
     with status_lock:
-        clients = pending_requests.copy()
-        pending_requests.clear()
+        # Les attentes sont indexées par condition : seules celles satisfaites par le nouveau statut sont réveillées
+        clients = []
+        for condition in list(pending_requests):
+            if not condition_holds(condition, data["status"]):
+                continue
+            waiters = pending_requests.pop(condition)
+            # Un notificateur plus ancien ne doit pas réveiller une attente déjà plus récente
+            stale = [p for p in waiters if p.last_version >= data["version"]]
+            clients.extend(p for p in waiters if p.last_version < data["version"])
+            if stale:
+                pending_requests[condition] = stale
+        subscribers = stream_subscribers.copy()
 
-    data = {
-        "status": current_task_status,
-        "version": status_version,
-        "timestamp": status_last_updated.isoformat()
-    }
     for p in clients:
         p.response_queue.put(data)
+    for q in subscribers:
+        q.put(data)
 
 def cleanup_expired_requests():
     global pending_requests
     now = time.time()
     with status_lock:
-        still = []
-        for req in pending_requests:
-            if now - req.created_at <= 30:
-                still.append(req)
-            else:
-                req.response_queue.put({"timeout": True})
+        still = {}
+        for condition, reqs in pending_requests.items():
+            for req in reqs:
+                if now - req.created_at <= 30:
+                    still.setdefault(condition, []).append(req)
+                else:
+                    req.response_queue.put({"timeout": True})
         pending_requests = still
 
 def cleanup_thread():
@@ -71,8 +104,13 @@ def poll_status():
     except:
         last_version = 0
 
+    try:
+        condition = parse_condition(request.args.getlist("until"))
+    except ValueError:
+        return jsonify({"error": "Condition invalide"}), 400
+
     with status_lock:
-        if last_version < status_version:
+        if last_version < status_version and condition_holds(condition, current_task_status):
             return jsonify({
                 "status": current_task_status,
                 "version": status_version,
@@ -80,15 +118,15 @@ def poll_status():
             })
 
     q = queue.Queue()
-    pending = PendingRequest(q, last_version)
+    pending = PendingRequest(q, last_version, condition)
     with status_lock:
-        if last_version < status_version:
+        if last_version < status_version and condition_holds(condition, current_task_status):
             return jsonify({
                 "status": current_task_status,
                 "version": status_version,
                 "timestamp": status_last_updated.isoformat()
             })
-        pending_requests.append(pending)
+        pending_requests.setdefault(pending.condition, []).append(pending)
 
     try:
         data = q.get(timeout=30)
@@ -98,10 +136,59 @@ def poll_status():
         pass
 
     with status_lock:
-        if pending in pending_requests:
-            pending_requests.remove(pending)
+        waiters = pending_requests.get(pending.condition)
+        if waiters and pending in waiters:
+            waiters.remove(pending)
+            if not waiters:
+                del pending_requests[pending.condition]
     return "", 204
 
+@app.route("/api/status-stream")
+def status_stream():
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", -1))
+    except:
+        last_event_id = -1
+
+    def event_stream():
+        q = queue.Queue()
+        try:
+            # Inscription dans le générateur : un flux jamais démarré (ex: HEAD) ne laisse pas de file orpheline
+            with status_lock:
+                stream_subscribers.append(q)
+                # "!=" et non "<" : après un redémarrage du serveur, status_version repart de 0
+                if last_event_id != status_version:
+                    q.put({
+                        "status": current_task_status,
+                        "version": status_version,
+                        "timestamp": status_last_updated.isoformat()
+                    })
+                    last_sent_version = -1
+                else:
+                    last_sent_version = status_version
+
+            while True:
+                try:
+                    data = q.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                # Un notificateur en vol peut livrer une version déjà envoyée
+                if data["version"] <= last_sent_version:
+                    continue
+                last_sent_version = data["version"]
+                yield f"id: {data['version']}\n"
+                yield f"data: {json.dumps(data)}\n\n"
+        finally:
+            with status_lock:
+                if q in stream_subscribers:
+                    stream_subscribers.remove(q)
+
+    return Response(event_stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.route("/api/update-status", methods=["POST"])
 def update_status():
     global current_task_status, status_version, status_last_updated
@@ -110,21 +197,25 @@ def update_status():
         return jsonify({"error": "Statut requis"}), 400
 
     new_status = data["status"]
-    if new_status not in ["En attente", "En cours", "Terminée", "Échec"]:
+    if new_status not in TASK_STATUSES:
         return jsonify({"error": "Statut invalide"}), 400
 
     with status_lock:
-        if new_status != current_task_status:
+        changed = new_status != current_task_status
+        if changed:
             current_task_status = new_status
             status_version += 1
             status_last_updated = datetime.now()
-            threading.Thread(target=notify_pending_clients, daemon=True).start()
+        snapshot = {
+            "status": current_task_status,
+            "version": status_version,
+            "timestamp": status_last_updated.isoformat()
+        }
 
-    return jsonify({
-        "status": current_task_status,
-        "version": status_version,
-        "timestamp": status_last_updated.isoformat()
-    })
+    if changed:
+        threading.Thread(target=notify_pending_clients, args=(snapshot,), daemon=True).start()
+
+    return jsonify(snapshot)
 
 CLIENT_HTML = """
 <!DOCTYPE html>
@@ -210,13 +301,25 @@ async function pollLoop(){
   }
 }
 
+function streamLoop(){
+  if(!window.EventSource){ pollLoop(); return; }
+  let opened = false;
+  const es = new EventSource('/api/status-stream');
+  es.onopen = ()=>{ opened = true; setConn('connected','✅ Connecté (SSE)'); };
+  es.onmessage = e=>{ updateUI(JSON.parse(e.data)); setConn('connected','✨ Statut mis à jour'); };
+  es.onerror = ()=>{
+    if(!opened || es.readyState===EventSource.CLOSED){ es.close(); pollLoop(); return; }
+    setConn('connecting','⏳ Reconnexion...');
+  };
+}
+
 async function init(){
   try{
     const res = await fetch('/api/status');
     const d = await res.json();
     updateUI(d);
     setConn('connected','✅ Connecté');
-    pollLoop();
+    streamLoop();
   }catch(e){
     setConn('error','⚠️ Serveur indisponible');
     setTimeout(init,3000);
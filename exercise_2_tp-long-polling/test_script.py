@@ -17,8 +17,9 @@ STATUSES = ["En attente", "En cours", "Terminée", "Échec"]
 class LongPollingClient:
     """Simule un client Long Polling"""
     
-    def __init__(self, client_id):
+    def __init__(self, client_id, until=None):
         self.client_id = client_id
+        self.until = until  # ex: "terminal" pour n'être réveillé que sur Terminée/Échec
         self.current_version = 0
         self.is_running = True
         self.updates_received = 0
@@ -39,7 +40,7 @@ class LongPollingClient:
                 
                 response = requests.get(
                     f"{SERVER_URL}/api/poll-status",
-                    params={"last_version": self.current_version},
+                    params={"last_version": self.current_version, "until": self.until},
                     timeout=35  # Légèrement plus que le timeout serveur
                 )
                 
@@ -81,6 +82,65 @@ class LongPollingClient:
         self.is_running = False
         self.log(f"🛑 Arrêt (Polls: {self.poll_count}, Updates: {self.updates_received})")
 
+class SSEClient:
+    """Simule un client EventSource sur /api/status-stream"""
+    
+    def __init__(self, client_id, last_event_id=None):
+        self.client_id = client_id
+        self.last_event_id = last_event_id
+        self.events = []  # (id, data)
+        self.is_running = True
+        self.thread = None
+        
+    def log(self, message):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] SSE {self.client_id}: {message}")
+    
+    def listen(self):
+        """Lit le flux et accumule les événements"""
+        while self.is_running:
+            headers = {}
+            if self.last_event_id is not None:
+                headers["Last-Event-ID"] = str(self.last_event_id)
+            
+            try:
+                # Timeout de lecture court : is_running est revérifié au moins chaque seconde,
+                # puis on se reconnecte avec Last-Event-ID comme le ferait EventSource
+                with requests.get(
+                    f"{SERVER_URL}/api/status-stream",
+                    headers=headers,
+                    stream=True,
+                    timeout=(5, 1)
+                ) as response:
+                    event_id, data = None, None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not self.is_running:
+                            break
+                        if line.startswith("id:"):
+                            event_id = int(line[3:].strip())
+                        elif line.startswith("data:"):
+                            data = json.loads(line[5:].strip())
+                        elif line == "" and data is not None:
+                            self.events.append((event_id, data))
+                            self.last_event_id = event_id
+                            self.log(f"✨ id={event_id} statut={data['status']} (v{data['version']})")
+                            event_id, data = None, None
+            except requests.exceptions.RequestException:
+                continue
+    
+    def start(self):
+        """Démarre le client en arrière-plan"""
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+        self.thread.start()
+        return self.thread
+    
+    def stop(self):
+        """Ferme le flux"""
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.log(f"🛑 Arrêt ({len(self.events)} événements)")
+
 def get_current_status():
     """Récupère le statut actuel"""
     try:
@@ -250,6 +310,101 @@ def test_timeout_behavior():
     
     return True
 
+def test_until_condition():
+    """Test des attentes conditionnelles (?until=terminal)"""
+    print("\n" + "="*50)
+    print("🧪 TEST 5: Condition until")
+    print("="*50)
+    
+    # Condition inconnue : rejet immédiat
+    response = requests.get(
+        f"{SERVER_URL}/api/poll-status",
+        params={"last_version": 0, "until": "Inconnu"},
+        timeout=5
+    )
+    if response.status_code != 400 or response.json().get("error") != "Condition invalide":
+        print(f"❌ Condition invalide acceptée: {response.status_code}")
+        return False
+    print("✅ Condition inconnue rejetée (400)")
+    
+    # Partir d'un état non terminal
+    update_status("En cours")
+    _, version = get_current_status()
+    
+    client = LongPollingClient("UNTIL", until="terminal")
+    client.current_version = version
+    client.start()
+    time.sleep(1)
+    
+    # Changements non terminaux : le client ne doit pas être réveillé
+    update_status("En attente")
+    time.sleep(1)
+    update_status("En cours")
+    time.sleep(1)
+    if client.updates_received != 0:
+        print(f"❌ Réveil inutile: {client.updates_received} updates")
+        client.stop()
+        return False
+    print("✅ Aucun réveil sur les statuts non terminaux")
+    
+    # Statut terminal : exactement un réveil
+    update_status("Échec")
+    time.sleep(2)
+    client.stop()
+    
+    if client.updates_received != 1:
+        print(f"❌ {client.updates_received} updates reçues, 1 attendue")
+        return False
+    print("✅ Un seul réveil sur Échec")
+    return True
+
+def test_sse_stream():
+    """Test du flux SSE /api/status-stream"""
+    print("\n" + "="*50)
+    print("🧪 TEST 6: Flux SSE")
+    print("="*50)
+    
+    status, version = get_current_status()
+    if status is None:
+        return False
+    
+    # Reprise avec Last-Event-ID à jour : aucun rejeu attendu
+    client = SSEClient("RESUME", last_event_id=version)
+    client.start()
+    time.sleep(2)
+    
+    if client.events:
+        print(f"❌ Rejeu inattendu avec Last-Event-ID={version}: {client.events}")
+        client.stop()
+        return False
+    print("✅ Pas de rejeu avec Last-Event-ID à jour")
+    
+    # Un événement par mise à jour, avec id == status_version
+    expected_versions = []
+    previous = status
+    for i in range(3):
+        new_status = random.choice([s for s in STATUSES if s != previous])
+        update_status(new_status)
+        previous = new_status
+        _, current_version = get_current_status()
+        expected_versions.append(current_version)
+        time.sleep(1)
+    
+    time.sleep(1)
+    client.stop()
+    
+    received_ids = [event_id for event_id, _ in client.events]
+    if received_ids != expected_versions:
+        print(f"❌ Événements reçus {received_ids}, attendus {expected_versions}")
+        return False
+    
+    if any(event_id != data["version"] for event_id, data in client.events):
+        print("❌ id: différent de status_version")
+        return False
+    
+    print(f"✅ {len(received_ids)} événements, un par mise à jour, id == version")
+    return True
+
 def main():
     """Fonction principale des tests"""
     print("🧪 TESTS DU SYSTÈME LONG POLLING")
@@ -275,7 +430,9 @@ def main():
         ("Fonctionnalité de base", test_basic_functionality),
         ("Clients multiples", test_multiple_clients),
         ("Test de stress", test_stress),
-        ("Comportement des timeouts", test_timeout_behavior)
+        ("Comportement des timeouts", test_timeout_behavior),
+        ("Condition until", test_until_condition),
+        ("Flux SSE", test_sse_stream)
     ]
     
     results = {}